@@ -1,9 +1,22 @@
-import xml.etree.ElementTree as ET
+from lxml import etree as ET  # lxml: Install via 'pip install lxml'
+from functools import lru_cache
 from pathlib import Path
 import os
 import re
+import sys
 import fitz  # PyMuPDF: Install via 'pip install pymupdf'
 
+# Patterns used on every element / PDF, compiled once
+_WS_RE = re.compile(r'\s+')
+_HYPHEN_RE = re.compile(r'(\w)-\s+(\w)')
+_SENT_RE = re.compile(r'[^.!?]{40,80}[.!?]')
+
+_TITLE_TAGS = frozenset(("title", "article-title", "book-title"))
+
+# Stock values written into the fixed copy
+_NCES_ID = "2021-126"
+_PUB_LOC_TEXT = "Washington DC"
+
 # --- 1. AEM COLOR SCHEME ---
 class Colors:
     HEADER = '\033[95m'
@@ -15,142 +28,160 @@ class Colors:
     BOLD = '\033[1m'
     RESET = '\033[0m'
 
+# Turn on ANSI colors in the Windows console directly instead of spawning cmd.exe via os.system('color')
 if os.name == 'nt':
-    os.system('color')
-
-# --- 2. LINE NUMBER PARSER ---
-class LineNumberingParser(ET.XMLParser):
-    def _start(self, *args, **kwargs):
-        element = super(self.__class__, self)._start(*args, **kwargs)
-        element._start_line_number = self.parser.CurrentLineNumber
-        return element
-
-# --- 3. FORMATTING & REPORTING HELPERS ---
+    import ctypes
+    _kernel32 = ctypes.windll.kernel32
+    _stdout = _kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    _mode = ctypes.c_uint32()
+    if _kernel32.GetConsoleMode(_stdout, ctypes.byref(_mode)):
+        _kernel32.SetConsoleMode(_stdout, _mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
+# --- 2. FORMATTING & REPORTING HELPERS ---
 def wrap_context(text, word_limit=12):
-    words = text.split()
+    words = text.split(None, word_limit)
     if not words: return f"{Colors.RED}[No text content]{Colors.RESET}"
     return " ".join(words[:word_limit]) + "..."
 
+def element_text(elem):
+    """Full subtree text; only built when a violation is reported."""
+    return "".join(elem.itertext()).strip()
+
+@lru_cache(maxsize=None)
+def local_name(tag):
+    """Tag without its {namespace} part; "" for comments and PIs (non-str tags)."""
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+def ns_tag(parent, name):
+    """`name` in the parent's namespace, so inserted nodes don't reset xmlns."""
+    ns = ET.QName(parent).namespace
+    return f"{{{ns}}}{name}" if ns else name
+
+_SEP = f"{Colors.CYAN}{'-' * 80}{Colors.RESET}\n"
+
 def print_aem_violation(tag, line, context, violation, fix, spec_ref):
-    sep = f"{Colors.CYAN}{'-' * 80}{Colors.RESET}"
-    print(f"{Colors.BOLD}{Colors.CYAN}REF: {spec_ref} | TAG: {tag} | LINE: {line}{Colors.RESET}")
-    print(f"{Colors.YELLOW}CONTEXT: {wrap_context(context)}{Colors.RESET}") 
-    print(f"{Colors.RED}VIOLATION: {violation}{Colors.RESET}")
-    print(f"{Colors.BITS_BLUE}FIX: {fix}{Colors.RESET}")
-    print(sep)
-
-# --- 4. PDF TEXT EXTRACTION ---
+    sys.stdout.write(
+        f"{Colors.BOLD}{Colors.CYAN}REF: {spec_ref} | TAG: {tag} | LINE: {line}{Colors.RESET}\n"
+        f"{Colors.YELLOW}CONTEXT: {wrap_context(context)}{Colors.RESET}\n"
+        f"{Colors.RED}VIOLATION: {violation}{Colors.RESET}\n"
+        f"{Colors.BITS_BLUE}FIX: {fix}{Colors.RESET}\n{_SEP}"
+    )
+
+# --- 3. PDF TEXT EXTRACTION ---
 def extract_pdf_text(pdf_path):
     """Extracts raw text from PDF for comparison."""
-    text = ""
     try:
         with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text += page.get_text("text") + " "
-        return re.sub(r'\s+', ' ', text).strip()
+            parts = [page.get_text("text") for page in doc]
+        return _WS_RE.sub(' ', " ".join(parts)).strip()
     except Exception as e:
         print(f"{Colors.RED}PDF Error: {e}{Colors.RESET}")
         return None
 
-# --- 5. THE FILE FIXING ENGINE ---
+# --- 4. THE FILE FIXING ENGINE ---
 def save_fixed_copy(tree, original_path):
     audited_dir = Path("files/audited")
     if not audited_dir.exists(): audited_dir.mkdir(parents=True)
     new_path = audited_dir / (original_path.stem + "_FIXED" + original_path.suffix)
     
-    ET.register_namespace('xlink', "http://www.w3.org/1999/xlink")
-    ET.register_namespace('mml', "http://www.w3.org/1998/Math/MathML")
-    
-    tree.write(new_path, encoding="utf-8", xml_declaration=True)
+    # lxml keeps the source namespace prefixes, so no registration is needed
+    tree.write(str(new_path), encoding="utf-8", xml_declaration=True)
     print(f"\n{Colors.BOLD}{Colors.JATS_GREEN}✔ AUTO-FIX COMPLETE: {new_path}{Colors.RESET}\n")
 
-# --- 6. CORE AUDIT LOGIC (The "Viewing" Rules) ---
+# --- 5. CORE AUDIT LOGIC (The "Viewing" Rules) ---
 def run_aem_fixer(xml_path, pdf_text=None):
     try:
-        parser = LineNumberingParser()
-        tree = ET.parse(xml_path, parser=parser)
+        tree = ET.parse(str(xml_path))
         root = tree.getroot()
     except Exception as e:
         print(f"{Colors.RED}XML ERROR: {e}{Colors.RESET}"); return
 
     filename = xml_path.name.upper()
     is_bits = "_BITS" in filename
-    violation_count = 0
+    dirty = False  # set by every rule that edits the tree
 
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'=' * 80}")
     print(f"|| AEM AUDIT & VIEWING STAGE: {filename:^36} ||")
     print(f"{'=' * 80}{Colors.RESET}\n")
 
-    # FRONT MATTER CHECK (NCES SPECIFIC)
-    article_meta = root.find(".//article-meta") or root.find(".//book-meta")
+    # FRONT MATTER CHECK (NCES SPECIFIC); {*} lookups here and below also match
+    # files that declare a default JATS/BITS namespace
+    article_meta = root.find(".//{*}article-meta")
+    if article_meta is None: article_meta = root.find(".//{*}book-meta")
     if article_meta is not None:
-        if article_meta.find("./article-id[@pub-id-type='nces']") is None:
-            violation_count += 1
-            new_id = ET.Element("article-id")
-            new_id.set("pub-id-type", "nces")
-            new_id.text = "2021-126"
+        if article_meta.find("./{*}article-id[@pub-id-type='nces']") is None:
+            dirty = True
+            new_id = ET.Element(ns_tag(article_meta, "article-id"), {"pub-id-type": "nces"}); new_id.text = _NCES_ID
             article_meta.insert(0, new_id)
-            print_aem_violation("article-id", "FRONT", "N/A", "Missing NCES ID", "Inserted 2021-126", "Front Matter")
-
-    # TREE ITERATION
-    xml_full_text_list = []
-    for elem in root.iter():
-        tag = elem.tag
-        line = getattr(elem, "_start_line_number", "?")
-        full_text = "".join(elem.itertext()).strip()
-        if full_text: xml_full_text_list.append(full_text)
-
-        # RULE: Publisher Loc
-        if tag == "publisher" and not any(c.tag == "publisher-loc" for c in elem):
-            violation_count += 1
-            new_loc = ET.Element("publisher-loc"); new_loc.text = "Washington DC"
-            elem.append(new_loc)
-            print_aem_violation(tag, line, full_text, "Missing Publisher Loc", "Added Washington DC", "Front Matter")
-
-        # RULE: Uniform Bold in Titles
-        if tag in ["title", "article-title"] and len(list(elem)) == 1 and list(elem)[0].tag == "bold":
-            violation_count += 1
-            child = list(elem)[0]
-            elem.text = child.text; elem.remove(child)
-            print_aem_violation(tag, line, full_text, "Uniform Bold Removal", "Stripped <bold> from title", "Emphasis")
-
-        # RULE: PDF Hyphens/Spaces
+            print_aem_violation("article-id", "FRONT", "N/A", "Missing NCES ID", f"Inserted {_NCES_ID}", "Front Matter")
+
+    # RULE: Publisher Loc
+    for elem in root.iter("{*}publisher"):
+        if not any(local_name(c.tag) == "publisher-loc" for c in elem):
+            dirty = True
+            context = element_text(elem)
+            ET.SubElement(elem, ns_tag(elem, "publisher-loc")).text = _PUB_LOC_TEXT
+            print_aem_violation("publisher", elem.sourceline or "?", context, "Missing Publisher Loc", f"Added {_PUB_LOC_TEXT}", "Front Matter")
+
+    # RULE: Uniform Bold in Titles
+    for elem in root.iter(*(f"{{*}}{t}" for t in _TITLE_TAGS)):
+        if len(elem) == 1 and local_name(elem[0].tag) == "bold":
+            dirty = True
+            context = element_text(elem)
+            child = elem[0]
+            # remove() drops the child's tail too, so keep it with the unwrapped text
+            elem.text = (elem.text or "") + (child.text or "") + (child.tail or ""); elem.remove(child)
+            print_aem_violation(local_name(elem.tag), elem.sourceline or "?", context, "Uniform Bold Removal", "Stripped <bold> from title", "Emphasis")
+
+    # RULE: PDF Hyphens/Spaces (only needs each element's own text; skips comments/PIs)
+    for elem in root.iter(ET.Element):
         if elem.text:
-            cleaned = re.sub(r'(\w)-\s+(\w)', r'\1\2', elem.text)
+            cleaned = _HYPHEN_RE.sub(r'\1\2', elem.text)
             if cleaned != elem.text:
-                violation_count += 1
+                dirty = True
+                context = element_text(elem)
                 elem.text = cleaned
-                print_aem_violation(tag, line, full_text, "Soft-hyphen Artifact", "Merged broken word", "Text Clean")
+                print_aem_violation(local_name(elem.tag), elem.sourceline or "?", context, "Soft-hyphen Artifact", "Merged broken word", "Text Clean")
 
-        # AUDITOR NOTES (Manual Review Required)
-        if tag == "alt-text" and "not available" in (elem.text or "").lower():
-            print(f"{Colors.YELLOW}[NOTE] Line {line}: Check PDF for actual Alt-Text.{Colors.RESET}")
+    # AUDITOR NOTES (Manual Review Required)
+    for elem in root.iter("{*}alt-text"):
+        if "not available" in (elem.text or "").lower():
+            print(f"{Colors.YELLOW}[NOTE] Line {elem.sourceline or '?'}: Check PDF for actual Alt-Text.{Colors.RESET}")
 
     # PDF TEXT COMPARISON (If PDF was selected)
     if pdf_text:
-        xml_blob = " ".join(xml_full_text_list)
+        # Normalize once so the sample check ignores case and line breaks
+        xml_blob = _WS_RE.sub(' ', "".join(root.itertext())).lower()
         # Look for a sample of the PDF text in the XML
-        sample_phrases = re.findall(r'[^.!?]{40,80}[.!?]', pdf_text)
+        sample_phrases = _SENT_RE.findall(pdf_text)
         mismatch_found = False
-        for phrase in sample_phrases[:15]: 
-            if phrase.strip() not in xml_blob:
-                print(f"{Colors.RED}[TEXT MISMATCH] Missing from XML: {phrase.strip()}{Colors.RESET}")
+        for phrase in sample_phrases[:15]:
+            phrase = phrase.strip()
+            if phrase.lower() not in xml_blob:
+                print(f"{Colors.RED}[TEXT MISMATCH] Missing from XML: {phrase}{Colors.RESET}")
                 mismatch_found = True
         if not mismatch_found:
             print(f"{Colors.JATS_GREEN}✔ Text flow matches PDF samples.{Colors.RESET}")
 
-    if violation_count > 0:
+    # Only re-serialize when a rule actually changed the tree
+    if dirty:
         save_fixed_copy(tree, xml_path)
     else:
         print(f"{Colors.BOLD}{Colors.JATS_GREEN}No violations found.{Colors.RESET}")
 
-# --- 7. MAIN INTERFACE ---
+# --- 6. MAIN INTERFACE ---
 def main():
     base_dir = Path("files")
     if not base_dir.exists(): base_dir.mkdir()
     
-    xmls = list(base_dir.glob("*.xml"))
-    pdfs = list(base_dir.glob("*.pdf"))
+    xmls, pdfs = [], []
+    # Sort the XML and PDF files in files/ into their lists in one pass
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if not entry.is_file(): continue
+            name = entry.name
+            if name.endswith(".xml"): xmls.append(Path(entry.path))
+            elif name.endswith(".pdf"): pdfs.append(Path(entry.path))
 
     print(f"\n{Colors.BOLD}{Colors.CYAN}--- AEM VIEWING & COMPARISON TOOL ---{Colors.RESET}")
     
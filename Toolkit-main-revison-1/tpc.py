@@ -1,6 +1,14 @@
-import xml.etree.ElementTree as ET
+from lxml import etree as ET  # lxml: Install via 'pip install lxml'
+from functools import lru_cache
 from pathlib import Path
 import os
+import sys
+
+_TITLE_TAGS = frozenset(("title", "article-title", "book-title"))
+
+# lxml keys namespaced attributes as {uri}name; reports show the usual prefix
+_XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+_ATTR_LABELS = {_XLINK_HREF: "xlink:href"}
 
 # --- 1. AEM COLOR SCHEME ---
 class Colors:
@@ -13,53 +21,56 @@ class Colors:
     BOLD = '\033[1m'
     RESET = '\033[0m'
 
+# Turn on ANSI colors in the Windows console directly instead of spawning cmd.exe via os.system('color')
 if os.name == 'nt':
-    os.system('color')
-
-# --- 2. LINE NUMBER PARSER ---
-class LineNumberingParser(ET.XMLParser):
-    def _start(self, *args, **kwargs):
-        element = super(self.__class__, self)._start(*args, **kwargs)
-        element._start_line_number = self.parser.CurrentLineNumber
-        return element
-
-# --- 3. AEM WORD WRAPPER ---
+    import ctypes
+    _kernel32 = ctypes.windll.kernel32
+    _stdout = _kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    _mode = ctypes.c_uint32()
+    if _kernel32.GetConsoleMode(_stdout, ctypes.byref(_mode)):
+        _kernel32.SetConsoleMode(_stdout, _mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
+# --- 2. AEM WORD WRAPPER ---
 def wrap_context(text, word_limit=15):
-    words = text.split()
+    # Stop splitting after word_limit words; the last item holds the unsplit rest
+    words = text.split(None, word_limit)
     if not words: return f"{Colors.RED}[No text content found]{Colors.RESET}"
-    lines = [" ".join(words[i : i + word_limit]) for i in range(0, len(words), word_limit)]
-    return "\n".join(lines)
+    return " ".join(words[:word_limit]) + ("..." if len(words) > word_limit else "")
+
+def element_text(elem):
+    """Full subtree text; only built when a violation is reported."""
+    return "".join(elem.itertext()).strip()
+
+@lru_cache(maxsize=None)
+def local_name(tag):
+    """Tag without its {namespace} part; "" for comments and PIs (non-str tags)."""
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+# --- 3. THE REPORTING ENGINE ---
+_SEP = f"{Colors.CYAN}{'-' * 150}{Colors.RESET}\n"
+# Extra blank lines here separate the stacked entries
+_END = f"{Colors.RED}{'=' * 150}{Colors.RESET}\n\n\n"
 
-# --- 4. THE REPORTING ENGINE ---
 def print_aem_violation(tag, line, context, violation, fix, spec_ref):
     """Prints a vertical stack based on AEM Spec rules with double spacing."""
-    sep = f"{Colors.CYAN}{'-' * 150}{Colors.RESET}"
-    
-    print(f"{Colors.BOLD}{Colors.CYAN}TAG / SPEC REFERENCE{Colors.RESET}")
-    print(f"{tag} ({Colors.YELLOW}{spec_ref}{Colors.RESET})")
-    print(sep)
-    
-    print(f"{Colors.BOLD}{Colors.CYAN}LINE{Colors.RESET}")
-    print(line)
-    print(sep)
-    
-    print(f"{Colors.BOLD}{Colors.CYAN}CONTEXT{Colors.RESET}")
-    print(f"{wrap_context(context, 15)}") 
-    print(sep)
-    
-    print(f"{Colors.BOLD}{Colors.RED}VIOLATION{Colors.RESET}")
-    print(violation)
-    print(sep)
-    
-    print(f"{Colors.BOLD}{Colors.BITS_BLUE}REQUIRED ACTION (PER SPEC){Colors.RESET}")
-    print(fix)
-    # Added an extra \n here to separate the stacked entries
-    print(f"{Colors.RED}{'=' * 150}{Colors.RESET}\n\n")
-
-# --- 5. AEM SPECIFICATION AUDIT LOGIC ---
+    # One write per violation instead of fifteen print() calls
+    sys.stdout.write(
+        f"{Colors.BOLD}{Colors.CYAN}TAG / SPEC REFERENCE{Colors.RESET}\n"
+        f"{tag} ({Colors.YELLOW}{spec_ref}{Colors.RESET})\n{_SEP}"
+        f"{Colors.BOLD}{Colors.CYAN}LINE{Colors.RESET}\n"
+        f"{line}\n{_SEP}"
+        f"{Colors.BOLD}{Colors.CYAN}CONTEXT{Colors.RESET}\n"
+        f"{wrap_context(context, 15)}\n{_SEP}"
+        f"{Colors.BOLD}{Colors.RED}VIOLATION{Colors.RESET}\n"
+        f"{violation}\n{_SEP}"
+        f"{Colors.BOLD}{Colors.BITS_BLUE}REQUIRED ACTION (PER SPEC){Colors.RESET}\n"
+        f"{fix}\n{_END}"
+    )
+
+# --- 4. AEM SPECIFICATION AUDIT LOGIC ---
 def run_aem_audit(xml_path):
     try:
-        tree = ET.parse(xml_path, parser=LineNumberingParser())
+        tree = ET.parse(str(xml_path))
         root = tree.getroot()
     except Exception as e:
         print(f"{Colors.RED}XML ERROR: {e}{Colors.RESET}")
@@ -80,61 +91,68 @@ def run_aem_audit(xml_path):
     
     # Mapping tags to mandatory attributes per AEM Spec
     aem_rules = {
-        'article': (['article-type'], "Article-type"),
-        'article-id': (['pub-id-type'], "JATS: article-id"),
-        'book-id': (['pub-id-type'], "BITS: book-id"),
-        'contrib': (['contrib-type'], "Contributors"),
-        'publisher-loc': ([], "Publisher"), # Logic handled below
-        'table-wrap': (['id', 'position'], "Tables"),
-        'fig': (['id', 'position'], "Figures"),
-        'graphic': (['xlink:href'], "Figures"),
-        'ext-link': (['xlink:href', 'ext-link-type'], "External References"),
-        'disp-formula': (['id'], "Math Equations"),
-        'inline-formula': (['id'], "Math Equations"),
+        'article': (('article-type',), "Article-type"),
+        'article-id': (('pub-id-type',), "JATS: article-id"),
+        'book-id': (('pub-id-type',), "BITS: book-id"),
+        'contrib': (('contrib-type',), "Contributors"),
+        'publisher-loc': ((), "Publisher"), # Logic handled below
+        'table-wrap': (('id', 'position'), "Tables"),
+        'fig': (('id', 'position'), "Figures"),
+        'graphic': ((_XLINK_HREF,), "Figures"),
+        'ext-link': ((_XLINK_HREF, 'ext-link-type'), "External References"),
+        'disp-formula': (('id',), "Math Equations"),
+        'inline-formula': (('id',), "Math Equations"),
     }
 
-    for elem in root.iter():
-        tag = elem.tag
-        line = getattr(elem, "_start_line_number", "?")
-        full_text = "".join(elem.itertext()).strip()
+    formula_tags = ("disp-formula", "inline-formula")
+    audit_tags = set(aem_rules) | {"publisher"} | _TITLE_TAGS
+
+    # lxml filters by tag in C and yields in document order; {*} also matches
+    # files that declare a default JATS/BITS namespace.
+    for elem in root.iter(*[f"{{*}}{t}" for t in audit_tags]):
+        tag = local_name(elem.tag)
+        # (violation, fix, spec) found on this element; the subtree text
+        # is built once, after the rules, and only if something fired.
+        found = []
 
         # 1. Mandatory Attribute Check
-        if tag in aem_rules:
-            required_attrs, spec_name = aem_rules[tag]
+        rule = aem_rules.get(tag)
+        if rule:
+            required_attrs, spec_name = rule
+            # Tuples keep the report in the order the spec lists the attributes
             for attr in required_attrs:
-                if attr not in elem.attrib:
-                    violation_count += 1
-                    print_aem_violation(tag, line, full_text, 
-                        f"Missing mandatory attribute: '{attr}'", 
-                        f"Add {attr} to follow {spec_name} guidelines.", spec_name)
+                if attr in elem.attrib: continue
+                attr = _ATTR_LABELS.get(attr, attr)
+                found.append((f"Missing mandatory attribute: '{attr}'", 
+                    f"Add {attr} to follow {spec_name} guidelines.", spec_name))
 
         # 2. BITS Specific: Publisher Location Rule
         if is_bits and tag == "publisher":
-            if not any(child.tag == "publisher-loc" for child in elem):
-                violation_count += 1
-                print_aem_violation(tag, line, full_text,
-                    "Missing <publisher-loc>",
+            if not any(local_name(child.tag) == "publisher-loc" for child in elem):
+                found.append(("Missing <publisher-loc>",
                     "Spec Rule: <publisher-loc> is mandatory in BITS. Use 'Washington DC' for gov-based if unknown.",
-                    "Publisher")
+                    "Publisher"))
 
         # 3. Emphasis Rule: Uniform Bold in Titles
-        if tag in ["title", "article-title", "book-title"]:
-            children = list(elem)
-            if len(children) == 1 and children[0].tag == "bold":
-                violation_count += 1
-                print_aem_violation(tag, line, full_text,
-                    "Uniform Bold Emphasis found in Title",
+        if tag in _TITLE_TAGS:
+            if len(elem) == 1 and local_name(elem[0].tag) == "bold":
+                found.append(("Uniform Bold Emphasis found in Title",
                     "Spec Rule: Remove uniform emphasis in titles unless it provides additional meaning.",
-                    "Emphasis")
+                    "Emphasis"))
 
         # 4. Math Rule: IDs for Formulas
-        if tag in ["disp-formula", "inline-formula"]:
+        if tag in formula_tags:
             if 'id' not in elem.attrib:
-                violation_count += 1
-                print_aem_violation(tag, line, full_text,
-                    "Math Equation missing ID",
+                found.append(("Math Equation missing ID",
                     "Spec Rule: 'id' is mandatory for linking to <xref> pointers.",
-                    "Math Equations")
+                    "Math Equations"))
+
+        if found:
+            violation_count += len(found)
+            line = elem.sourceline or "?"
+            full_text = element_text(elem)
+            for violation, fix, spec_name in found:
+                print_aem_violation(tag, line, full_text, violation, fix, spec_name)
 
     # Final Summary Dashboard
     if violation_count == 0:
@@ -147,12 +165,18 @@ def run_aem_audit(xml_path):
         print(f"| {'AEM AUDIT COMPLETE: ' + str(violation_count) + ' issues identified.':^76} |")
         print(f"{'+' + '-'*78 + '+'}{Colors.RESET}")
 
-# --- 6. FILE SELECTOR ---
+# --- 5. FILE SELECTOR ---
 def main():
     base_dir = Path("files")
     if not base_dir.exists(): base_dir.mkdir()
     
-    xmls = list(base_dir.glob("*.xml"))
+    xmls = []
+    # Collect the XML files in files/; other entries are skipped
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if not entry.is_file(): continue
+            name = entry.name
+            if name.endswith(".xml"): xmls.append(Path(entry.path))
     if not xmls:
         print(f"{Colors.RED}Please put XML files in the /files/ folder.{Colors.RESET}")
         return
@@ -1,15 +1,22 @@
 import fitz  # PyMuPDF
-import xml.etree.ElementTree as ET
+from lxml import etree as ET  # lxml: Install via 'pip install lxml'
+import os
 import re
+import sys
 import textwrap
 from pathlib import Path
 
+_WS_RE = re.compile(r'\s+')
+# Content elements, compiled once; libxml2 returns matches in document order
+_CONTENT_XPATH = ET.XPath(" | ".join(f".//{t}" for t in (
+    'p', 'article-title', 'title', 'td', 'term', 'def', 'abstract')))
+
 
 # --- EXTRACTION ---
 def find_func_path():
     def clean_text(text):
         if not text: return ""
-        return re.sub(r'\s+', ' ', text).strip()
+        return _WS_RE.sub(' ', text).strip()
 
     def extract_pdf_paragraphs(pdf_path):
         paragraphs = []
@@ -28,16 +35,14 @@ def find_func_path():
 
     def extract_xml_paragraphs(xml_path):
         try:
-            tree = ET.parse(xml_path)
+            tree = ET.parse(str(xml_path))
             root = tree.getroot()
-            content_tags = {'p', 'article-title', 'title', 'td', 'term', 'def', 'abstract'}
             extracted = []
-            for elem in root.iter():
-                if elem.tag in content_tags:
-                    text = "".join(elem.itertext())
-                    clean_p = clean_text(text)
-                    if len(clean_p) > 20:
-                        extracted.append(clean_p)
+            for elem in _CONTENT_XPATH(root):
+                text = "".join(elem.itertext())
+                clean_p = clean_text(text)
+                if len(clean_p) > 20:
+                    extracted.append(clean_p)
             return extracted
         except Exception as e:
             print(f"Error reading XML: {e}")
@@ -55,36 +60,44 @@ def find_func_path():
         # Intersection line: ||-----------+------------||
         separator = "||" + "-" * (content_w + 2) + "+" + "-" * (status_w + 2) + "||"
         
-        print("\n" + border)
-        print(f"|| {'PDF CONTENT EXTRACT':<{content_w + 1}} | {'XML STATUS':<{status_w + 1}} ||")
-        print(border)
+        # Rows are buffered and written once at the end instead of one print() per line
+        out = ["", border,
+               f"|| {'PDF CONTENT EXTRACT':<{content_w + 1}} | {'XML STATUS':<{status_w + 1}} ||",
+               border]
 
         found_count = 0
-        xml_pool_lower = [x.lower() for x in xml_pool]
+        wrapper = textwrap.TextWrapper(width=content_w)
+        # One lowercased blob: a single C-level substring search per paragraph.
+        # Paragraphs are whitespace-cleaned, so a needle never spans the "\n" joins.
+        xml_blob_lower = "\n".join(xml_pool).lower()
+        # Most PDF blocks line up with the start of an XML paragraph: a set hit
+        # there skips the full blob scan, which is then only paid on misses.
+        xml_heads = {x[:60] for x in xml_blob_lower.split("\n")}
 
         for para in pdf_paras:
             # Match logic: check if the first 60 chars of PDF para exist anywhere in XML
-            match = any(para.lower()[:60] in x for x in xml_pool_lower)
+            needle = para.lower()[:60]
+            match = needle in xml_heads or needle in xml_blob_lower
             status_text = "FOUND" if match else "MISSING"
             if match: found_count += 1
 
-            wrapper = textwrap.TextWrapper(width=content_w)
             lines = wrapper.wrap(text=para)
 
             for i, line in enumerate(lines):
                 # Only show status on the first line of the wrapped paragraph block
                 current_status = f"[{status_text}]" if i == 0 else ""
                 # Fixed the formatting error by using status_w (int) instead of status_text (str)
-                print(f"|| {line:<{content_w}} | {current_status:<{status_w + 1}} ||")
+                out.append(f"|| {line:<{content_w}} | {current_status:<{status_w + 1}} ||")
             
-            print(separator)
+            out.append(separator)
 
         # Footer summary
-        print(border)
+        out.append(border)
         match_pct = (found_count / len(pdf_paras) * 100) if pdf_paras else 0
         summary = f"TOTAL MATCHES: {found_count}/{len(pdf_paras)} ({match_pct:.1f}%)"
-        print(f"|| {summary:^{width - 6}} ||")
-        print(border + "\n")
+        out.append(f"|| {summary:^{width - 6}} ||")
+        out.append(border + "\n")
+        sys.stdout.write("\n".join(out) + "\n")
 
     # --- UI & MAIN ---
 
@@ -95,8 +108,14 @@ def find_func_path():
             print("|| Created /files/ directory. Add your files and restart. ||")
             return None, None
             
-        pdfs = list(base_dir.glob("*.pdf"))
-        xmls = list(base_dir.glob("*.xml"))
+        xmls, pdfs = [], []
+        # Sort the XML and PDF files in files/ into their lists in one pass
+        with os.scandir(base_dir) as it:
+            for entry in it:
+                if not entry.is_file(): continue
+                name = entry.name
+                if name.endswith(".xml"): xmls.append(Path(entry.path))
+                elif name.endswith(".pdf"): pdfs.append(Path(entry.path))
         
         if not pdfs or not xmls:
             print("!! Please drop at least one PDF and one XML in the /files/ folder !!")
@@ -1,38 +1,41 @@
 import fitz  # PyMuPDF
-import xml.etree.ElementTree as ET
+from lxml import etree as ET  # lxml: Install via 'pip install lxml'
+import os
 import re
 import difflib
 import textwrap
 from pathlib import Path
 
+_WS_RE = re.compile(r'\s+')
+_SPLIT_SENT_RE = re.compile(r'(?<=[.!?]) +')
+# Content elements, compiled once; libxml2 returns matches in document order
+_CONTENT_XPATH = ET.XPath(" | ".join(f".//{t}" for t in (
+    'article-title', 'book-title', 'subtitle', 'p', 'title', 'label', 'td', 'term', 'def')))
+
 # --- EXTRACTION LOGIC ---
 
 def clean_text(text):
     if not text: return ""
-    return re.sub(r'\s+', ' ', text).strip()
+    return _WS_RE.sub(' ', text).strip()
 
 def split_into_sentences(text):
-    sentences = re.split(r'(?<=[.!?]) +', text)
+    sentences = _SPLIT_SENT_RE.split(text)
     return [s.strip() for s in sentences if len(s.strip()) > 2]
 
 def extract_pdf_text(pdf_path):
-    text = ""
     with fitz.open(str(pdf_path)) as doc:
-        for page in doc:
-            text += page.get_text()
-    return clean_text(text)
+        parts = [page.get_text() for page in doc]
+    return clean_text(" ".join(parts))
 
 def extract_xml_text(xml_path):
-    tree = ET.parse(xml_path)
+    tree = ET.parse(str(xml_path))
     root = tree.getroot()
-    content_tags = {'article-title', 'book-title', 'subtitle', 'p', 'title', 'label', 'td', 'term', 'def'}
     extracted_parts = []
-    for elem in root.iter():
-        if elem.tag in content_tags:
-            if elem.text and elem.text.strip():
-                extracted_parts.append(elem.text.strip())
-            if elem.tail and elem.tail.strip():
-                extracted_parts.append(elem.tail.strip())
+    for elem in _CONTENT_XPATH(root):
+        if elem.text and elem.text.strip():
+            extracted_parts.append(elem.text.strip())
+        if elem.tail and elem.tail.strip():
+            extracted_parts.append(elem.tail.strip())
     return clean_text(" ".join(extracted_parts))
 
 # --- FILE SELECTION UI (Symmetric Table) ---
@@ -44,8 +47,14 @@ def get_file_selection():
         print("|| Folder 'files' created. Please put your documents there and restart. ||")
         return None, None
 
-    pdfs = list(base_dir.glob("*.pdf"))
-    xmls = list(base_dir.glob("*.xml"))
+    xmls, pdfs = [], []
+    # Sort the XML and PDF files in files/ into their lists in one pass
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if not entry.is_file(): continue
+            name = entry.name
+            if name.endswith(".xml"): xmls.append(Path(entry.path))
+            elif name.endswith(".pdf"): pdfs.append(Path(entry.path))
 
     # Header
     print("\n" + "="*80)
@@ -79,9 +88,11 @@ def get_file_selection():
 
 # --- UPDATED GRAPH SCANNER (NO RIGHT BARS) ---
 
+_WRAPPER = textwrap.TextWrapper(width=80)
+
 def wrap_and_print(prefix, text, width=80):
     """Wraps text with a left bar only, no right-side bars."""
-    wrapper = textwrap.TextWrapper(width=width)
+    wrapper = _WRAPPER if width == _WRAPPER.width else textwrap.TextWrapper(width=width)
     lines = wrapper.wrap(text=text)
     for i, line in enumerate(lines):
         if i == 0:
@@ -91,9 +102,28 @@ def wrap_and_print(prefix, text, width=80):
             indent = " " * len(prefix)
             print(f"|| {indent} {line}")
 
+# Largest replace block (PDF sentences x XML sentences) that still gets
+# Differ's near-match pairing; see draw_comparison_graph.
+_PAIRING_LIMIT = 100
+
 def draw_comparison_graph(pdf_sent, xml_sent):
-    d = difflib.Differ()
-    diff = list(d.compare(pdf_sent, xml_sent))
+    # Align whole sentence lists with plain opcodes. Differ's near-match
+    # pairing (MISSING next to its closest EXTRA) compares every sentence pair
+    # in a block, so it is only used on small replace blocks; bigger ones
+    # list their MISSING lines, then their EXTRA lines, at opcode cost.
+    matcher = difflib.SequenceMatcher(a=pdf_sent, b=xml_sent, autojunk=False)
+    differ = difflib.Differ()
+    diff = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            diff.extend((' ', s) for s in pdf_sent[i1:i2])
+        elif op == 'replace' and (i2 - i1) * (j2 - j1) <= _PAIRING_LIMIT:
+            for entry in differ.compare(pdf_sent[i1:i2], xml_sent[j1:j2]):
+                if entry[0] != '?': # skip character-level hint lines
+                    diff.append((entry[0], entry[2:]))
+        else: # 'delete' / 'insert' / large 'replace'
+            diff.extend(('-', s) for s in pdf_sent[i1:i2])
+            diff.extend(('+', s) for s in xml_sent[j1:j2])
     
     # Header without right bars
     print("\n" + "="*80)
@@ -101,11 +131,8 @@ def draw_comparison_graph(pdf_sent, xml_sent):
     print("="*80)
     
     line_num = 1
-    for entry in diff:
-        status = entry[0]
-        sentence = entry[2:]
-        
-        if status == '  ': # Match
+    for status, sentence in diff:
+        if status == ' ': # Match
             if line_num % 15 == 0:
                 print(f"|| Line {line_num:03} | [OK] Verified sequence matches...")
         